@@ -1,24 +1,263 @@
 import csv
-import json
+import multiprocessing
+import os
+import sys
 import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-def process_csv_file(csv_file_path, max_rows=None):
+from report_merge import IO_BUFFER_SIZE, merge
+from row_processor import process_rows
+
+# pyarrow parses the CSV in C and only converts the columns we ask for;
+# fall back to the csv module when it is not installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa_csv = None
+
+# Files are only split across worker processes in chunks of at least this size
+MIN_CHUNK_SIZE = 32 * 1024 * 1024
+
+class EmbeddedNewlineError(ValueError):
+    """Raised when a CSV record spans several lines, so the file cannot be split on newlines"""
+
+class ChunkStopped(Exception):
+    """Raised in a worker when another worker has already found the split unusable"""
+
+# Lines a worker reads between checks of the shared stop event
+STOP_CHECK_LINES = 4096
+
+# Set in each worker process by init_worker; signals every worker to stop
+stop_event = None
+
+def column_indices(header, columns):
     """
-    Process CSV file to extract unique Image ID and Namespace Labels/tenable.vsad pairs
+    Resolve the positions of the given columns in a CSV header row
+    
+    Args:
+        header (list): Header row
+        columns (list): Header names of the columns to look up
+    
+    Returns:
+        list: Index of each column, in the order given
+    """
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise ValueError(f"Column(s) {', '.join(repr(c) for c in missing)} do not exist in CSV file")
+    return [header.index(column) for column in columns]
+
+def iter_columns(csv_file_path, columns):
+    """
+    Yield the values of the given columns for each CSV row
+    
+    Uses pyarrow's streaming reader when available, switching to csv.reader
+    (from the same row onwards) if pyarrow rejects a row, e.g. one with extra
+    trailing fields. Blank lines and rows too short to hold every column are
+    skipped.
     
     Args:
         csv_file_path (str): Path to the CSV file
-        max_rows (int, optional): Maximum number of rows to process (None for all rows)
+        columns (list): Header names of the columns to extract
+    
+    Yields:
+        tuple: One value per requested column, in the order given
+    """
+    rows_read = 0
+    if pa_csv is not None:
+        try:
+            reader = pa_csv.open_csv(
+                csv_file_path,
+                parse_options=pa_csv.ParseOptions(
+                    newlines_in_values=True,
+                    # Raise rather than drop rows whose field count differs from
+                    # the header; csv.reader keeps rows with extra trailing fields
+                    invalid_row_handler=lambda invalid_row: 'error'
+                ),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=columns,
+                    column_types={column: pa.string() for column in columns},
+                    strings_can_be_null=False
+                )
+            )
+            for batch in reader:
+                batch_rows = list(zip(*(batch.column(column).to_pylist() for column in columns)))
+                rows_read += len(batch_rows)
+                yield from batch_rows
+            return
+        except pa.ArrowInvalid as e:
+            # A batch fails before any of its rows are yielded, so the csv
+            # module can pick up exactly where pyarrow stopped
+            print(f"pyarrow could not read every row ({e}); continuing with the csv module")
+    
+    with open(csv_file_path, 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as file:
+        csv_reader = csv.reader(file)
+        
+        # Resolve column positions once from the header
+        indices = column_indices(next(csv_reader, None) or [], columns)
+        min_row_len = max(indices) + 1
+        
+        for row in csv_reader:
+            if len(row) >= min_row_len:
+                if rows_read:
+                    rows_read -= 1
+                    continue
+                yield tuple(row[i] for i in indices)
+
+def iter_byte_range(csv_file_path, start, end, indices, stop=None):
+    """
+    Yield the values at the given column indices for CSV lines starting in [start, end)
+    
+    Lines are split on raw newlines, so records must not contain embedded
+    newlines; EmbeddedNewlineError is raised on any line with an unbalanced
+    quote count, which is how a quoted field spanning lines shows up. Blank
+    lines and rows too short to hold every column are skipped. If the stop
+    event gets set, ChunkStopped is raised within STOP_CHECK_LINES lines.
+    
+    Args:
+        csv_file_path (str): Path to the CSV file
+        start (int): Byte offset of the range start (must be past the header)
+        end (int): Byte offset of the range end
+        indices (list): Column indices to extract
+        stop (multiprocessing.Event, optional): Event that aborts the read when set
+    
+    Yields:
+        tuple: One value per column index, in the order given
+    """
+    def lines(file):
+        lines_until_check = STOP_CHECK_LINES
+        # Begin at the first line starting at or after 'start'
+        file.seek(start - 1)
+        position = start - 1 + len(file.readline())
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            lines_until_check -= 1
+            if not lines_until_check:
+                lines_until_check = STOP_CHECK_LINES
+                if stop is not None and stop.is_set():
+                    raise ChunkStopped()
+            # Escaped quotes come in pairs, so an odd count means a quoted
+            # field continues past this newline
+            if line.count(b'"') & 1:
+                raise EmbeddedNewlineError(f"CSV record spanning lines found at byte offset {position - len(line):,}")
+            yield line.decode('utf-8')
+    
+    min_row_len = max(indices) + 1
+    with open(csv_file_path, 'rb', buffering=IO_BUFFER_SIZE) as file:
+        for row in csv.reader(lines(file)):
+            if len(row) >= min_row_len:
+                yield tuple(row[i] for i in indices)
+
+def init_worker(event):
+    """
+    Worker process initializer: keep the stop event shared by all workers
+    """
+    global stop_event
+    stop_event = event
+
+def process_chunk(csv_file_path, start, end, indices):
+    """
+    Worker entry point: extract Image ID -> vsad mappings from one byte range
+    
+    On EmbeddedNewlineError the shared stop event is set so the other workers
+    give up early, and the error is re-raised.
+    
+    Returns:
+        tuple: (final_dict, images_without_vsad, total_rows, vsad_found_count),
+            or None if the worker was stopped because another chunk failed
+    """
+    final_dict = {}
+    images_without_vsad = set()
+    rows = iter_byte_range(csv_file_path, start, end, indices, stop_event)
+    try:
+        total_rows, vsad_found_count = process_rows(rows, final_dict, images_without_vsad, progress=False)
+    except EmbeddedNewlineError:
+        if stop_event is not None:
+            stop_event.set()
+        raise
+    except ChunkStopped:
+        return None
+    return final_dict, images_without_vsad, total_rows, vsad_found_count
+
+def process_csv_file_parallel(csv_file_path, workers, start_time):
+    """
+    Split the CSV into line-aligned byte ranges and process them in worker processes
+    
+    The per-chunk results are merged in file order, so the output matches a
+    sequential run (the first vsad seen for an image still wins). Raises
+    EmbeddedNewlineError if any record spans lines; the worker that finds it
+    stops the others through a shared event, so this happens soon after.
     
     Returns:
-        dict: Dictionary with unique Image ID -> tenable.vsad mappings
+        tuple: (final_dict, images_without_vsad, total_rows, vsad_found_count)
     """
-    unique_entries = {}
-    missing_vsad_count = 0
+    with open(csv_file_path, 'rb') as file:
+        header_line = file.readline()
+    if header_line.count(b'"') & 1:
+        raise EmbeddedNewlineError("CSV header spans lines")
+    indices = column_indices(next(csv.reader([header_line.decode('utf-8')]), []),
+                             ['Image ID', 'Namespace Labels'])
+    
+    data_start = len(header_line)
+    file_size = os.path.getsize(csv_file_path)
+    chunk_size = -(-(file_size - data_start) // workers)
+    bounds = [(start, min(start + chunk_size, file_size))
+              for start in range(data_start, file_size, chunk_size)]
+    
+    final_dict = {}
+    images_without_vsad = set()
     total_rows = 0
     vsad_found_count = 0
     
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(multiprocessing.Event(),)) as executor:
+        futures = [executor.submit(process_chunk, csv_file_path, start, end, indices)
+                   for start, end in bounds]
+        for chunk_number, future in enumerate(futures, 1):
+            # Raises EmbeddedNewlineError for the chunk that found a record spanning lines
+            result = future.result()
+            if result is None:
+                # Stopped early because a later chunk failed; its error is raised below
+                continue
+            chunk_dict, chunk_without_vsad, chunk_rows, chunk_vsad_count = result
+            if chunk_number == 1:
+                # Adopt the first chunk's containers as-is rather than re-inserting every entry
+                final_dict, images_without_vsad = chunk_dict, chunk_without_vsad
+            else:
+                for image_id, vsad in chunk_dict.items():
+                    final_dict.setdefault(image_id, vsad)
+                images_without_vsad |= chunk_without_vsad
+            total_rows += chunk_rows
+            vsad_found_count += chunk_vsad_count
+            elapsed = time.time() - start_time
+            print(f"Processed chunk {chunk_number}/{len(bounds)}, {total_rows:,} rows... ({elapsed:.1f}s elapsed)")
+    
+    return final_dict, images_without_vsad, total_rows, vsad_found_count
+
+def process_csv_file(csv_file_path, max_rows=None, workers=1):
+    """
+    Process CSV file to extract unique Image ID and Namespace Labels/tenable.vsad pairs
+    
+    Args:
+        csv_file_path (str): Path to the CSV file
+        max_rows (int, optional): Maximum number of rows to process (None for all rows)
+        workers (int, optional): Worker processes for large files (default: 1, read
+            sequentially; None for one per CPU). Falls back to a sequential read
+            if any record spans lines
+    
+    Returns:
+        tuple: (final_dict, images_without_vsad) where final_dict maps each
+            Image ID to the first vsad seen for it and images_without_vsad is
+            the set of Image IDs seen on rows without a vsad
+    """
+    # Built in a single pass; the first vsad seen for an image wins
+    final_dict = {}
+    images_without_vsad = set()
+    
     print(f"Starting to process the CSV file: {csv_file_path}")
     if max_rows:
         print(f"Processing first {max_rows:,} rows...")
@@ -28,59 +267,24 @@ def process_csv_file(csv_file_path, max_rows=None):
     start_time = time.time()
     
     try:
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row in csv_reader:
-                total_rows += 1
-                
-                # Stop if max_rows limit is reached
-                if max_rows and total_rows > max_rows:
-                    break
-                
-                # Progress update every 10000 rows
-                if total_rows % 10000 == 0:
-                    elapsed = time.time() - start_time
-                    print(f"Processed {total_rows:,} rows... ({elapsed:.1f}s elapsed)")
-                
-                # Extract Image ID and Namespace Labels
-                image_id = row.get('Image ID', '') or ''
-                namespace_labels_str = row.get('Namespace Labels', '') or ''
-                
-                # Strip whitespace if not None
-                image_id = image_id.strip() if image_id else ''
-                namespace_labels_str = namespace_labels_str.strip() if namespace_labels_str else ''
-                
-                # Skip rows with empty Image ID
-                if not image_id:
-                    continue
-                
-                # Parse Namespace Labels JSON
-                vsad = None
-                if namespace_labels_str:
-                    try:
-                        namespace_labels = json.loads(namespace_labels_str)
-                        # Look for tenable.vsad key
-                        for key, value in namespace_labels.items():
-                            if key == 'kubernetes.namespace.label.tenable.vsad':
-                                vsad = value
-                                vsad_found_count += 1
-                                break
-                    except json.JSONDecodeError:
-                        # If JSON parsing fails, skip this entry
-                        continue
-                
-                # Count entries without vsad
-                if vsad is None:
-                    missing_vsad_count += 1
-                
-                # Create unique key combination (image_id, vsad)
-                key = (image_id, vsad)
-                if key not in unique_entries:
-                    unique_entries[key] = {
-                        'image_id': image_id,
-                        'vsad': vsad
-                    }
+        # Optionally split large files across processes; max_rows needs a sequential read
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, os.path.getsize(csv_file_path) // MIN_CHUNK_SIZE)
+        parallel_result = None
+        if workers > 1 and not max_rows:
+            print(f"Using {workers} worker processes...")
+            try:
+                parallel_result = process_csv_file_parallel(csv_file_path, workers, start_time)
+            except EmbeddedNewlineError as e:
+                print(f"{e}; reading the file sequentially instead")
+        
+        if parallel_result is not None:
+            final_dict, images_without_vsad, total_rows, vsad_found_count = parallel_result
+        else:
+            rows = iter_columns(csv_file_path, ['Image ID', 'Namespace Labels'])
+            total_rows, vsad_found_count = process_rows(
+                rows, final_dict, images_without_vsad, max_rows, start_time
+            )
     
     except FileNotFoundError:
         print(f"Error: File '{csv_file_path}' not found.")
@@ -94,43 +298,14 @@ def process_csv_file(csv_file_path, max_rows=None):
     print(f"Total rows processed: {total_rows:,}")
     print(f"Rows with vsad: {vsad_found_count:,}")
     
-    return unique_entries
-
-def create_final_dictionary(unique_entries):
-    """
-    Create final dictionary with Image ID -> vsad mappings
-    
-    Args:
-        unique_entries (dict): Dictionary from process_csv_file function
-    
-    Returns:
-        dict: Final dictionary with Image ID -> vsad mappings
-    """
-    # Separate entries with and without vsad
-    entries_with_vsad = []
-    entries_without_vsad = []
-    
-    for key, value in unique_entries.items():
-        image_id, vsad = key
-        if vsad:
-            entries_with_vsad.append((image_id, vsad))
-        else:
-            entries_without_vsad.append((image_id, vsad))
-    
-    # Create final dictionary with only entries that have vsad
-    final_dict = {}
-    for image_id, vsad in entries_with_vsad:
-        final_dict[image_id] = vsad
-    
-    return final_dict, entries_with_vsad, entries_without_vsad
+    return final_dict, images_without_vsad
 
-def display_results(final_dict, entries_with_vsad, show_count=10):
+def display_results(final_dict, show_count=10):
     """
     Display the results in a readable format
     
     Args:
         final_dict (dict): Final dictionary with Image ID -> vsad mappings
-        entries_with_vsad (list): List of tuples (image_id, vsad)
         show_count (int): Number of entries to display (default: 10)
     """
     print(f"\nFINAL DICTIONARY FORMAT (Image ID -> vsad):")
@@ -141,21 +316,29 @@ def display_results(final_dict, entries_with_vsad, show_count=10):
 
 def main():
     """
-    Main function to process the CSV file and display results
+    Main function to process the CSV file, write output.csv and merge into v1-report.csv
     """
     # Path to the CSV file
     csv_file_path = './v2-report.csv'
     
+    # Worker processes for large files, e.g. --workers 8 (default: read sequentially)
+    workers = 1
+    if "--workers" in sys.argv:
+        try:
+            workers = int(sys.argv[sys.argv.index("--workers") + 1])
+        except (ValueError, IndexError):
+            print("Please provide a number of worker processes after --workers.")
+            return None
+    
     # Process the CSV file
     # For testing, you can add max_rows parameter, e.g., max_rows=50000
-    unique_entries = process_csv_file(csv_file_path)
+    result = process_csv_file(csv_file_path, workers=workers)
     
-    if unique_entries:
-        # Create final dictionary
-        final_dict, entries_with_vsad, entries_without_vsad = create_final_dictionary(unique_entries)
+    if result is not None:
+        final_dict, images_without_vsad = result
         
         # Display results
-        #display_results(final_dict, entries_with_vsad)
+        #display_results(final_dict)
         
         # Print final dictionary variable info
         print(f"\nThe final dictionary 'final_dict' contains {len(final_dict):,} unique Image ID -> vsad mappings")
@@ -163,12 +346,14 @@ def main():
         
         # Write results to output.csv
         output_file = 'output.csv'
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(['Image ID', 'vsad'])
-            for image_id, vsad in final_dict.items():
-             writer.writerow([image_id, vsad])
+            writer.writerows(final_dict.items())
         print(f"\nResults written to {output_file}")
+        
+        # Merge into v1-report.csv straight from memory, without re-reading output.csv
+        merge('./v1-report.csv', final_dict, 'merged-report.csv')
         return final_dict
     else:
         print("No data was processed")
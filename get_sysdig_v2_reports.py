@@ -25,7 +25,11 @@ def main():
         "Authorization": f"Bearer {api_key}"
     }
 
-    response = requests.get(api_url, headers=headers)
+    # Reuse one connection (and TLS handshake) for every API call and the download
+    session = requests.Session()
+    session.headers.update(headers)
+
+    response = session.get(api_url)
     if response.status_code != 200:
         print(f"Request failed with status code {response.status_code}: {response.text}")
         return
@@ -91,7 +95,7 @@ def main():
         }
 
         jobs_url = f"https://{sysdig_tenant}/api/platform/reporting/v1/jobs"
-        post_response = requests.post(jobs_url, headers=headers, json=payload)
+        post_response = session.post(jobs_url, json=payload)
         if post_response.status_code != 200:
             print(f"POST failed with status code {post_response.status_code}: {post_response.text}")
             return
@@ -105,8 +109,8 @@ def main():
             print("Error: No job ID returned in response")
             return
         
-        print(f"Job ID: {job_id}")a
-        print("Polling job status every 30 seconds...")
+        print(f"Job ID: {job_id}")
+        print("Polling job status (every 2 seconds at first, backing off to every 60 seconds)...")
         
         # Poll job status until complete
         status_url = f"https://{sysdig_tenant}/api/platform/reporting/v1/jobs/{job_id}"
@@ -115,8 +119,13 @@ def main():
         timeout_seconds = 2 * 60 * 60  # 2 hours
         start_polling_time = get_time()
         
+        # Poll quickly at first so short jobs finish fast, then back off
+        poll_delay = 2
+        max_poll_delay = 60
+        
         while True:
-            time.sleep(30)  # Wait 30 seconds before checking
+            time.sleep(poll_delay)  # Wait before checking
+            poll_delay = min(poll_delay * 1.5, max_poll_delay)
             
             # Check if we've exceeded the 2-hour timeout
             elapsed_time = get_time() - start_polling_time
@@ -125,7 +134,7 @@ def main():
                 print(f"Job ID {job_id} may still be running. Check manually if needed.")
                 return
             
-            status_response = requests.get(status_url, headers=headers)
+            status_response = session.get(status_url)
             if status_response.status_code != 200:
                 print(f"Status check failed with status code {status_response.status_code}: {status_response.text}")
                 return
@@ -142,27 +151,31 @@ def main():
                 if file_path:
                     print(f"Downloading file from: {file_path}")
                     
-                    # Download the file
-                    download_response = requests.get(file_path, headers=headers)
-                    if download_response.status_code == 200:
-                        # Extract filename from URL or use a default
-                        filename = "v2-report.csv.gz"
-                        
-                        with open(filename, "wb") as f:
-                            f.write(download_response.content)
-                        print(f"File downloaded successfully: {filename}")
-                        
-                        # Extract the gzip file
-                        try:
+                    # Download the file, decompressing it as it streams in
+                    with session.get(file_path, stream=True) as download_response:
+                        if download_response.status_code == 200:
+                            # Undo any HTTP transfer encoding; the report's own gzip layer is left for GzipFile
+                            download_response.raw.decode_content = True
+                            
+                            # Extract into a temporary file next to the report and only replace
+                            # the report once the whole stream has been read, so a dropped
+                            # connection or truncated gzip never leaves a partial v2-report.csv
                             extracted_filename = "v2-report.csv"
-                            with gzip.open(filename, 'rb') as f_in:
-                                with open(extracted_filename, 'wb') as f_out:
-                                    shutil.copyfileobj(f_in, f_out)
-                            print(f"File extracted successfully: {extracted_filename}")
-                        except Exception as e:
-                            print(f"Error extracting file: {e}")
-                    else:
-                        print(f"Download failed with status code {download_response.status_code}")
+                            partial_filename = f"{extracted_filename}.part"
+                            try:
+                                with gzip.GzipFile(fileobj=download_response.raw) as f_in:
+                                    with open(partial_filename, 'wb') as f_out:
+                                        shutil.copyfileobj(f_in, f_out, length=1 << 20)
+                                os.replace(partial_filename, extracted_filename)
+                                print(f"File downloaded and extracted successfully: {extracted_filename}")
+                            except Exception as e:
+                                print(f"Error downloading or extracting file: {e}")
+                                print(f"{extracted_filename} was not updated.")
+                            finally:
+                                if os.path.exists(partial_filename):
+                                    os.remove(partial_filename)
+                        else:
+                            print(f"Download failed with status code {download_response.status_code}")
                 else:
                     print("Error: No file path found in job response")
                 break
@@ -0,0 +1,103 @@
+import csv
+import time
+
+# Larger file buffers mean far fewer read/write syscalls on multi-GB reports
+IO_BUFFER_SIZE = 1 << 20
+
+# Rows are written out in batches of this size
+WRITE_BATCH_SIZE = 10000
+
+def load_output_dict(output_csv_path):
+    """
+    Read an output.csv written by csv_processor.py
+
+    Args:
+        output_csv_path (str): Path to the output.csv file
+
+    Returns:
+        dict: Image ID -> vsad mappings
+    """
+    output_dict = {}
+    with open(output_csv_path, newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as out_csv:
+        reader = csv.reader(out_csv)
+        header = next(reader, [])
+        image_id_idx = header.index('Image ID')
+        vsad_idx = header.index('vsad')
+        min_row_len = max(image_id_idx, vsad_idx) + 1
+        for row in reader:
+            if len(row) >= min_row_len:
+                output_dict[row[image_id_idx]] = row[vsad_idx]
+    return output_dict
+
+def merge(v1_csv_path, final_dict, merged_csv_path):
+    """
+    Copy the v1 report, appending a vsad column looked up by Image ID
+
+    Args:
+        v1_csv_path (str): Path to the v1-report.csv file
+        final_dict (dict): Image ID -> vsad mappings
+        merged_csv_path (str): Path of the merged report to write
+
+    Returns:
+        tuple: (row_count, match_count), or None if the v1 report could not be merged
+    """
+    try:
+        with open(v1_csv_path, newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as v1_csv:
+            v1_reader = csv.reader(v1_csv)
+            header = next(v1_reader, [])
+            # Check the header before opening (and truncating) the merged report
+            if 'Image ID' not in header:
+                print(f"Error: File '{v1_csv_path}' has no 'Image ID' column.")
+                return None
+
+            with open(merged_csv_path, 'w', newline='', encoding='utf-8', buffering=IO_BUFFER_SIZE) as merged_csv:
+                image_id_idx = header.index('Image ID')
+                width = len(header)
+                writer = csv.writer(merged_csv)
+                writer.writerow(header + ['vsad'])
+
+                # Initialize counters and timer
+                row_count = 0
+                match_count = 0
+                batch = []
+                start_time = time.time()
+
+                print(f"Starting merge process at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+                for row in v1_reader:
+                    # Skip blank lines
+                    if not row:
+                        continue
+                    row_count += 1
+
+                    # Pad short rows and drop extra fields so every row matches the header
+                    if len(row) != width:
+                        row = row[:width] + [''] * (width - len(row))
+
+                    vsad = final_dict.get(row[image_id_idx], '')
+
+                    # Count matches (non-empty vsad values)
+                    if vsad:
+                        match_count += 1
+
+                    row.append(vsad)
+                    batch.append(row)
+
+                    # Write out each full batch, with a progress report every 10,000 rows
+                    if len(batch) == WRITE_BATCH_SIZE:
+                        writer.writerows(batch)
+                        batch.clear()
+                        elapsed_time = time.time() - start_time
+                        print(f"Processed {row_count:,} rows in {elapsed_time:.2f} seconds - {match_count:,} vsad matches written")
+
+                # Write out the final partial batch
+                writer.writerows(batch)
+
+    except FileNotFoundError:
+        print(f"Error: File '{v1_csv_path}' not found.")
+        return None
+
+    # Final summary
+    total_time = time.time() - start_time
+    print(f"\nCompleted! Processed {row_count:,} total rows in {total_time:.2f} seconds")
+    return row_count, match_count
@@ -0,0 +1,101 @@
+"""
+Per-row extraction loop used by csv_processor.py
+
+Kept in its own fully type-annotated module so it can optionally be compiled
+with mypyc (``mypyc row_processor.py``); the compiled extension is picked up
+automatically in place of this file. Everything here also runs as plain Python.
+"""
+import json
+import re
+import time
+from typing import Iterable, Optional
+
+# Namespace label holding the tenable.vsad value
+VSAD_KEY = 'kubernetes.namespace.label.tenable.vsad'
+
+# Quoted form of the key for the substring pre-check; more selective than
+# the bare key, which lets the C string search skip ahead faster
+VSAD_NEEDLE = f'"{VSAD_KEY}"'
+
+# Pulls the (still JSON-escaped) string value of the vsad key straight out of
+# the Namespace Labels JSON so the rest of the document is never parsed
+VSAD_PATTERN = re.compile(r'"' + re.escape(VSAD_KEY) + r'"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Rows between progress updates
+PROGRESS_INTERVAL = 10000
+
+def process_rows(rows: Iterable[tuple[str, str]],
+                 final_dict: dict[str, str],
+                 images_without_vsad: set[str],
+                 max_rows: Optional[int] = None,
+                 start_time: float = 0.0,
+                 progress: bool = True) -> tuple[int, int]:
+    """
+    Extract tenable.vsad from (Image ID, Namespace Labels) rows
+
+    Args:
+        rows (iterable): (image_id, namespace_labels_str) tuples
+        final_dict (dict): Updated in place with Image ID -> first vsad seen
+        images_without_vsad (set): Updated in place with Image IDs seen on rows without a vsad
+        max_rows (int, optional): Maximum number of rows to process (None for all rows)
+        start_time (float): time.time() at which processing started, for progress output
+        progress (bool): Print a progress update every PROGRESS_INTERVAL rows (default: True)
+
+    Returns:
+        tuple: (total_rows, vsad_found_count)
+    """
+    total_rows = 0
+    vsad_found_count = 0
+    search = VSAD_PATTERN.search
+    # Row numbers at which to stop and to print progress; a plain equality
+    # test per row is cheaper than re-checking max_rows and a modulus (0 never
+    # matches, since total_rows is incremented first)
+    stop_at = max_rows + 1 if max_rows else 0
+    next_report = PROGRESS_INTERVAL if progress else 0
+    # Many images share a vsad, so store one string object per distinct value
+    vsad_values: dict[str, str] = {}
+
+    for image_id, namespace_labels_str in rows:
+        total_rows += 1
+
+        # Stop if max_rows limit is reached
+        if total_rows == stop_at:
+            break
+
+        # Progress update every PROGRESS_INTERVAL rows
+        if total_rows == next_report:
+            next_report += PROGRESS_INTERVAL
+            elapsed = time.time() - start_time
+            print(f"Processed {total_rows:,} rows... ({elapsed:.1f}s elapsed)")
+
+        # Strip whitespace
+        image_id = image_id.strip()
+        namespace_labels_str = namespace_labels_str.strip()
+
+        # Skip rows with empty Image ID
+        if not image_id:
+            continue
+
+        # Extract tenable.vsad from the Namespace Labels JSON
+        vsad: Optional[str] = None
+        # Only search when the vsad key can actually be present
+        if VSAD_NEEDLE in namespace_labels_str:
+            match = search(namespace_labels_str)
+            if match:
+                vsad = match.group(1)
+                # Decode JSON escapes only when there are any
+                if '\\' in vsad:
+                    try:
+                        vsad = json.loads(f'"{vsad}"')
+                    except json.JSONDecodeError:
+                        # If the value is not valid JSON, skip this entry
+                        continue
+                vsad_found_count += 1
+
+        if vsad:
+            if image_id not in final_dict:
+                final_dict[image_id] = vsad_values.setdefault(vsad, vsad)
+        else:
+            images_without_vsad.add(image_id)
+
+    return total_rows, vsad_found_count